@@ -10,16 +10,310 @@ Features:
 - Maintains code annotation tracking
 """
 
+import errno
+import io
 import json
 import time
 import re
 import os
+import mmap
 import shutil
+import tempfile
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
 import hashlib
+import functools
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import accumulate, islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes (orjson when installed, stdlib json otherwise)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+# [epoch second, ISO string] of the last formatted timestamp
+_ts_cache = [0, ""]
+
+
+def _now_iso() -> str:
+    """Current local time in ISO format at second resolution, formatted once per second"""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _ts_cache[1]
+
+
+def _content_hash(data: bytes) -> str:
+    """128-bit content hash (xxh3 when installed, blake2b otherwise)"""
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _default_file_mode() -> int:
+    """Mode a plain open() would create files with under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once at import: os.umask can only be read by setting it, which
+# isn't safe to do while other threads create files
+_FILE_MODE = _default_file_mode()
+
+
+def _atomic_write(path: Path, data: bytes):
+    """Replace path with data via an fsynced temp file and os.replace
+
+    Readers see either the old or the new file, never a partial one, and the
+    old inode is left untouched, so hardlinked snapshots keep their content.
+    The file keeps its mode (new files follow the umask, not the temp file's 0600).
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = _FILE_MODE
+
+    f = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix='.tmp', delete=False)
+    try:
+        with f:
+            os.chmod(f.name, mode)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f.name, path)
+    except BaseException:
+        try:
+            os.unlink(f.name)
+        except OSError:
+            pass
+        raise
+
+
+# os.link errors meaning "hardlinks don't work here" (across filesystems,
+# filesystems without links, link count limits) rather than a real failure
+_LINK_UNSUPPORTED = frozenset({errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP,
+                               errno.EMLINK, errno.EINVAL, errno.ENOSYS})
+
+
+def _snapshot_file(src: Path, dest: Path):
+    """Hardlink src to dest, copying when links are unsupported (e.g. across filesystems)"""
+    try:
+        os.link(src, dest)
+    except FileExistsError:
+        # A backup earlier in the same second; replace its snapshot unless
+        # it already is this very file
+        if not os.path.samefile(src, dest):
+            os.unlink(dest)
+            _snapshot_file(src, dest)
+    except OSError as e:
+        if e.errno not in _LINK_UNSUPPORTED:
+            raise
+        shutil.copy2(src, dest)
+
+# Task file markers (matched on raw bytes, no decoding)
+_TASK_OPEN_RE = re.compile(rb'- \[ \]')
+_TASK_DONE_RE = re.compile(rb'- \[x\]')
+_TASK_STATUS_RE = re.compile(rb'\*\*Status:\*\*\s*([^|\n]+)')
+
+# Code annotation tags (matched on raw bytes across the whole file)
+_AGENT_RE = re.compile(rb'@agent:[ \t]*(\S+)')
+_TIMESTAMP_RE = re.compile(rb'@timestamp:[ \t]*(.+)')
+_TASK_RE = re.compile(rb'@task:[ \t]*(.+)')
+_NOTES_RE = re.compile(rb'@notes:[ \t]*(.+)')
+
+# Lines after an @agent: tag searched for its timestamp/task/notes
+_ANNOTATION_LOOKAHEAD = 5
+
+
+# Replaces the middle of messages over the per-message token cap
+_TRUNCATION_MARKER = "\n...[truncated {} tokens]...\n"
+
+# Bulky content moved out of older messages: fenced code blocks and
+# multi-line JSON documents ({ or [ at line start through a closing line)
+_BLOCK_START_RE = re.compile(r'```|^[{\[]', re.MULTILINE)
+_JSON_CLOSE_RE = re.compile(r'^[}\]],?[ \t]*$', re.MULTILINE)
+_JSON_DECODER = json.JSONDecoder()
+
+# JSON candidates longer than this are left inline rather than parsed
+_JSON_BLOCK_MAX_CHARS = 256 * 1024
+_BLOB_REF = "<blob:{}>"
+_BLOB_REF_RE = re.compile(r'<blob:([0-9a-f]+)>')
+
+# Blocks shorter than this are cheaper to keep inline than to reference
+_BLOB_MIN_CHARS = 512
+
+# Message contents longer than this are stored once in the blob store
+# and referenced by hash (shared across agents)
+_CONTENT_REF_MIN_CHARS = 4096
+
+# Stale files scanned per worker task; below two batches a pool costs more
+# to start (a fresh interpreter per worker on Windows) than it saves
+_SCAN_CHUNK = 32
+_PARALLEL_SCAN_MIN_FILES = 64
+
+# Directories never descended into when looking for source files
+_SKIP_DIRS = frozenset({'node_modules', 'dist', '.git'})
+
+
+def _iter_ts_files(root: Union[str, Path], skip: frozenset = _SKIP_DIRS) -> Iterator[os.DirEntry]:
+    """Yield .ts files under root, pruning skipped directories before descending"""
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip:
+                        yield from _iter_ts_files(entry.path, skip)
+                elif entry.name.endswith('.ts'):
+                    yield entry
+    except OSError as e:
+        print(f"⚠️  Error listing {root}: {e}")
+
+
+def _iter_dirs(root: Union[str, Path], skip: frozenset = _SKIP_DIRS) -> Iterator[str]:
+    """Yield root and every directory under it, pruning skipped directories before descending"""
+    yield str(root)
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and entry.name not in skip:
+                    yield from _iter_dirs(entry.path, skip)
+    except OSError as e:
+        print(f"⚠️  Error listing {root}: {e}")
+
+
+def _bulky_blocks(content: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) of fenced code blocks and multi-line JSON documents
+
+    A JSON candidate runs from a line starting with { or [ to the next line
+    starting with } or ], and only counts if it parses, so prose such as
+    "[link] ..." or log lines like "[12:00] INFO" are left alone. Closing lines
+    are found once up front, so each candidate costs a lookup, not a rescan.
+    """
+    closes = [match.start() for match in _JSON_CLOSE_RE.finditer(content)]
+    pos = 0
+    while True:
+        match = _BLOCK_START_RE.search(content, pos)
+        if not match:
+            return
+        start = match.start()
+        pos = match.end()
+
+        if match.group() == '```':
+            end = content.find('```', pos)
+            if end != -1:
+                pos = end + 3
+                yield start, pos
+            continue
+
+        i = bisect_left(closes, pos)
+        if i == len(closes) or closes[i] - start > _JSON_BLOCK_MAX_CHARS:
+            continue
+        try:
+            _, end = _JSON_DECODER.raw_decode(content, start)
+        except ValueError:
+            continue
+        except RecursionError:
+            # Nested too deep to parse; so is every candidate up to its end
+            pos = closes[i]
+            continue
+        if end == closes[i] + 1:
+            pos = end
+            yield start, end
+
+
+def _tag_value(match) -> str:
+    """Decoded, stripped value of an annotation tag match ("" if absent)"""
+    return match.group(1).decode('utf-8', 'replace').strip() if match else ""
+
+
+def _truncate_middle(content: str, tokens: int, cap: int) -> Tuple[str, int]:
+    """Cut the middle out of content so that roughly cap tokens remain
+
+    Tokens are assumed to be spread evenly over the characters.
+    """
+    keep_chars = len(content) * cap // tokens
+    head = keep_chars // 2
+    tail = keep_chars - head
+    marker = _TRUNCATION_MARKER.format(tokens - cap)
+    return content[:head] + marker + content[len(content) - tail:], cap
+
+
+def _scan_file(file_path: str) -> Tuple[str, Optional[List[Dict]]]:
+    """Scan a file for agent annotations, returned as plain dicts (None if it can't be read)
+
+    Module-level (and dict-based) so it can be dispatched to worker processes.
+    """
+    annotations = []
+
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        # Offset of each line start (plus EOF) to map matches to line numbers
+        line_starts = [0, *accumulate(map(len, data.splitlines(keepends=True)))]
+        last_line = 0
+
+        # Match: // @agent: agent-name
+        for match in _AGENT_RE.finditer(data):
+            line_index = bisect_right(line_starts, match.start()) - 1
+            if line_index + 1 == last_line:
+                continue  # One annotation per line
+            last_line = line_index + 1
+
+            # Find timestamp, task, notes on the next few lines
+            window_end = min(line_index + 1 + _ANNOTATION_LOOKAHEAD, len(line_starts) - 1)
+            window = data[line_starts[line_index + 1]:line_starts[window_end]]
+
+            annotations.append({
+                "file_path": file_path,
+                "line_number": last_line,
+                "agent_name": match.group(1).decode('utf-8', 'replace'),
+                "timestamp": _tag_value(_TIMESTAMP_RE.search(window)),
+                "task_ref": _tag_value(_TASK_RE.search(window)),
+                "notes": _tag_value(_NOTES_RE.search(window))
+            })
+
+    except Exception as e:
+        print(f"⚠️  Error scanning {file_path}: {e}")
+        return file_path, None
+
+    return file_path, annotations
+
 
 @dataclass
 class AgentContext:
@@ -27,13 +321,33 @@ class AgentContext:
     agent_name: str
     timestamp: str
     task_file: str
-    current_tokens: int
     max_tokens: int = 200000
-    messages: List[Dict] = None
+    messages: Deque[Dict] = None
+    system_message: Optional[Dict] = None
+    _cached_tokens: Optional[int] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        if self.messages is None:
-            self.messages = []
+        self.messages = deque(self.messages or ())
+
+        # Older context files kept the system prompt at messages[0]
+        if self.system_message is None and self.messages and self.messages[0].get('role') == 'system':
+            self.system_message = self.messages.popleft()
+
+    @property
+    def current_tokens(self) -> int:
+        """Tokens held by the system message and queued messages
+
+        Summed once on first access, then adjusted incrementally by the manager.
+        """
+        if self._cached_tokens is None:
+            self._cached_tokens = sum(m.get('tokens', 0) for m in self.messages)
+            if self.system_message:
+                self._cached_tokens += self.system_message.get('tokens', 0)
+        return self._cached_tokens
+
+    @current_tokens.setter
+    def current_tokens(self, value: int):
+        self._cached_tokens = value
 
 @dataclass
 class CodeAnnotation:
@@ -48,15 +362,22 @@ class CodeAnnotation:
 class AgentContextManager:
     """Manages agent contexts and coordination"""
 
-    def __init__(self, base_dir: str = "c:/dev/fxd"):
+    # Tokenizer shared by all instances, loaded on first use
+    _encoding = None
+
+    def __init__(self, base_dir: str = "c:/dev/fxd", per_message_cap: int = 8000):
         self.base_dir = Path(base_dir)
+        self.per_message_cap = per_message_cap
         self.context_dir = self.base_dir / "agent-coordinator" / "contexts"
         self.backup_dir = self.base_dir / "agent-coordinator" / "backups"
+        self.blob_dir = self.base_dir / "agent-coordinator" / "blobs"
         self.annotations_file = self.base_dir / "agent-coordinator" / "annotations.json"
+        self.index_file = self.base_dir / "agent-coordinator" / "annotations.index.json"
 
         # Create directories
         self.context_dir.mkdir(parents=True, exist_ok=True)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
 
         # Load annotations index
         self.annotations = self._load_annotations()
@@ -64,59 +385,129 @@ class AgentContextManager:
         # Track agents
         self.agents: Dict[str, AgentContext] = {}
 
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _cached_load(path: str, mtime_ns: int, size: int) -> Dict:
+        """Parse a JSON file once per (path, mtime, size), shared across instances
+
+        The result is shared between callers and must not be mutated.
+        """
+        with open(path, 'rb') as f:
+            return _loads(f.read())
+
     def _load_annotations(self) -> Dict[str, List[CodeAnnotation]]:
         """Load code annotations index"""
-        if self.annotations_file.exists():
-            with open(self.annotations_file, 'r') as f:
-                data = json.load(f)
-                return {
-                    file_path: [CodeAnnotation(**ann) for ann in anns]
-                    for file_path, anns in data.items()
-                }
-        return {}
+        try:
+            stat = self.annotations_file.stat()
+        except FileNotFoundError:
+            return {}
+
+        data = self._cached_load(str(self.annotations_file), stat.st_mtime_ns, stat.st_size)
+        return {
+            file_path: [CodeAnnotation(**ann) for ann in anns]
+            for file_path, anns in data.items()
+        }
 
     def _save_annotations(self):
         """Save annotations index"""
+        # Built by hand: asdict() deep-copies every field via reflection
         data = {
-            file_path: [asdict(ann) for ann in anns]
+            file_path: [
+                {
+                    "file_path": ann.file_path,
+                    "line_number": ann.line_number,
+                    "agent_name": ann.agent_name,
+                    "timestamp": ann.timestamp,
+                    "task_ref": ann.task_ref,
+                    "notes": ann.notes
+                }
+                for ann in anns
+            ]
             for file_path, anns in self.annotations.items()
         }
-        with open(self.annotations_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        _atomic_write(self.annotations_file, _dumps(data, indent=True))
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load scan index: file path -> {mtime_ns, size, annotations}"""
+        if self.index_file.exists():
+            with open(self.index_file, 'rb') as f:
+                return _loads(f.read())
+        return {}
+
+    def _save_index(self, index: Dict[str, Dict]):
+        """Save scan index"""
+        _atomic_write(self.index_file, _dumps(index))
 
     def register_agent(self, agent_name: str, task_file: str):
         """Register a new agent"""
         context = AgentContext(
             agent_name=agent_name,
-            timestamp=datetime.now().isoformat(),
-            task_file=task_file,
-            current_tokens=0
+            timestamp=_now_iso(),
+            task_file=task_file
         )
         self.agents[agent_name] = context
         self._save_context(agent_name, context)
         print(f"✅ Registered agent: {agent_name}")
 
-    def add_message(self, agent_name: str, role: str, content: str, tokens: int):
-        """Add message to agent context"""
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens with tiktoken (cl100k_base), or estimate ~4 chars/token without it"""
+        if AgentContextManager._encoding is None and tiktoken is not None:
+            try:
+                AgentContextManager._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # The BPE file is downloaded on first use; don't retry when offline
+                print("⚠️  Could not load tiktoken encoding, estimating token counts")
+                AgentContextManager._encoding = False
+
+        if not AgentContextManager._encoding:
+            return (len(text) + 3) // 4
+        # Special-token text in messages is just text here
+        return len(AgentContextManager._encoding.encode(text, disallowed_special=()))
+
+    def add_message(self, agent_name: str, role: str, content: str, tokens: Optional[int] = None):
+        """Add message to agent context (tokens are counted if not given)"""
         if agent_name not in self.agents:
             raise ValueError(f"Agent {agent_name} not registered")
 
+        if tokens is None:
+            tokens = self._count_tokens(content)
+
+        # Oversized messages (tool output etc.) keep only their head and tail
+        original_tokens = tokens
+        if role != "system" and self.per_message_cap and tokens > self.per_message_cap:
+            content, tokens = _truncate_middle(content, tokens, self.per_message_cap)
+
         message = {
             "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "tokens": tokens
         }
+        self._set_content(message, content)
+        if tokens != original_tokens:
+            message["original_tokens"] = original_tokens
 
         context = self.agents[agent_name]
-        context.messages.append(message)
-        context.current_tokens += tokens
 
-        # Check if trimming needed
+        # Count before mutating: the first access sums the existing messages
+        context.current_tokens += tokens
+        if role == "system":
+            # System prompt is never evicted, so it lives outside the message queue
+            if context.system_message:
+                context.current_tokens -= context.system_message.get('tokens', 0)
+            context.system_message = message
+        else:
+            context.messages.append(message)
+
+        # Check if trimming needed; trimming compacts the whole log once,
+        # otherwise only the new message is written
         if context.current_tokens > context.max_tokens:
             self._trim_context(agent_name)
-
-        self._save_context(agent_name, context)
+            self._save_context(agent_name, context)
+        elif role == "system":
+            # The system message lives in the meta file
+            self._save_meta(agent_name, context)
+        else:
+            self._append_message(agent_name, message)
 
     def _trim_context(self, agent_name: str):
         """Trim context to stay under limit"""
@@ -127,26 +518,145 @@ class AgentContextManager:
         # Trim in chunks of 20k tokens
         target_tokens = context.max_tokens - 20000
 
-        while context.current_tokens > target_tokens and len(context.messages) > 1:
-            # Remove oldest non-system message
-            removed = context.messages.pop(1)  # Keep index 0 (system message)
+        # Move bulky blocks out of older messages before evicting anything
+        context.current_tokens -= self._compress_tier(context.messages)
+
+        # Evict oldest messages first; the system message is held separately
+        while context.current_tokens > target_tokens and context.messages:
+            removed = context.messages.popleft()
             context.current_tokens -= removed.get('tokens', 0)
 
         print(f"✅ Trimmed {agent_name} to {context.current_tokens} tokens")
-        self._save_context(agent_name, context)
+
+    def _compress_tier(self, messages: Deque[Dict], keep_recent: int = 20) -> int:
+        """Replace code blocks / JSON in all but the newest messages with blob references
+
+        Each message is only processed once (marked "compressed"), so later
+        trims don't rescan or reload it. Returns the number of tokens freed.
+        """
+        freed = 0
+
+        for message in islice(messages, max(0, len(messages) - keep_recent)):
+            if message.get('compressed'):
+                continue
+            message['compressed'] = True
+
+            content = self.message_content(message)
+            parts = []
+            last = 0
+            for start, end in _bulky_blocks(content):
+                if end - start >= _BLOB_MIN_CHARS:
+                    parts += [content[last:start], _BLOB_REF.format(self._store_blob(content[start:end]))]
+                    last = end
+            if parts:
+                compressed = ''.join(parts) + content[last:]
+                tokens = message.get('tokens', 0)
+                self._set_content(message, compressed)
+                message['tokens'] = tokens * len(compressed) // len(content)
+                freed += tokens - message['tokens']
+
+        return freed
+
+    def _set_content(self, message: Dict, content: str):
+        """Set message content inline, or by reference into the blob store if large"""
+        if len(content) > _CONTENT_REF_MIN_CHARS:
+            message.pop('content', None)
+            message['content_ref'] = self._store_blob(content)
+        else:
+            message.pop('content_ref', None)
+            message['content'] = content
+
+    def _store_blob(self, block: str) -> str:
+        """Write block to the blob store (once) and return its hash"""
+        data = block.encode('utf-8')
+        digest = _content_hash(data)
+        blob_file = self.blob_dir / f"{digest}.txt"
+        if not blob_file.exists():
+            _atomic_write(blob_file, data)
+        return digest
+
+    def load_blob(self, digest: str) -> str:
+        """Read a block from the blob store"""
+        return (self.blob_dir / f"{digest}.txt").read_text(encoding='utf-8')
+
+    def message_content(self, message: Dict) -> str:
+        """Content of a message, reading it from the blob store if stored by reference"""
+        if 'content_ref' in message:
+            return self.load_blob(message['content_ref'])
+        return message.get('content', '')
+
+    def expand_blobs(self, content: str) -> str:
+        """Restore the original text of a message containing blob references"""
+        return _BLOB_REF_RE.sub(lambda match: self.load_blob(match.group(1)), content)
+
+    def _save_meta(self, agent_name: str, context: AgentContext):
+        """Save agent context header (everything except the message log)"""
+        meta = {
+            "agent_name": context.agent_name,
+            "timestamp": context.timestamp,
+            "task_file": context.task_file,
+            "max_tokens": context.max_tokens,
+            "system_message": context.system_message
+        }
+        _atomic_write(self.context_dir / f"{agent_name}.meta.json", _dumps(meta, indent=True))
+
+    def _append_message(self, agent_name: str, message: Dict):
+        """Append a single message to the agent's log"""
+        log_file = self.context_dir / f"{agent_name}.jsonl"
+
+        # Appending in place would also change backups hardlinked to this log,
+        # so give it a fresh inode first
+        if log_file.exists() and log_file.stat().st_nlink > 1:
+            _atomic_write(log_file, log_file.read_bytes())
+
+        with open(log_file, 'ab+') as f:
+            # An interrupted append can leave a partial last line; terminate it
+            # so this message isn't glued onto it (and skipped with it)
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            f.write(_dumps(message) + b'\n')
 
     def _save_context(self, agent_name: str, context: AgentContext):
-        """Save agent context"""
-        context_file = self.context_dir / f"{agent_name}.json"
-        with open(context_file, 'w') as f:
-            json.dump(asdict(context), f, indent=2)
+        """Save agent context, compacting the message log"""
+        _atomic_write(
+            self.context_dir / f"{agent_name}.jsonl",
+            b''.join(_dumps(message) + b'\n' for message in context.messages)
+        )
+        self._save_meta(agent_name, context)
+
+    def _iter_messages(self, log_file: Path) -> Iterator[Dict]:
+        """Stream messages from an agent's log"""
+        if not log_file.exists():
+            return
+        with open(log_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield _loads(line)
+                except json.JSONDecodeError:
+                    # Partial line left behind by an interrupted append
+                    print(f"⚠️  Skipping corrupt entry in {log_file.name}")
 
     def load_context(self, agent_name: str) -> Optional[AgentContext]:
         """Load agent context"""
-        context_file = self.context_dir / f"{agent_name}.json"
-        if context_file.exists():
-            with open(context_file, 'r') as f:
-                data = json.load(f)
+        meta_file = self.context_dir / f"{agent_name}.meta.json"
+        if meta_file.exists():
+            with open(meta_file, 'rb') as f:
+                data = _loads(f.read())
+            data['messages'] = self._iter_messages(self.context_dir / f"{agent_name}.jsonl")
+            data.pop('current_tokens', None)  # Recomputed from the messages
+            return AgentContext(**data)
+
+        # Contexts written before the append-only log
+        legacy_file = self.context_dir / f"{agent_name}.json"
+        if legacy_file.exists():
+            with open(legacy_file, 'rb') as f:
+                data = _loads(f.read())
+                data.pop('current_tokens', None)
                 return AgentContext(**data)
         return None
 
@@ -156,76 +666,111 @@ class AgentContextManager:
         backup_subdir = self.backup_dir / timestamp
         backup_subdir.mkdir(exist_ok=True)
 
-        for context_file in self.context_dir.glob("*.json"):
-            shutil.copy2(context_file, backup_subdir / context_file.name)
+        files = [f for pattern in ("*.json", "*.jsonl") for f in self.context_dir.glob(pattern)]
 
         # Also backup annotations
         if self.annotations_file.exists():
-            shutil.copy2(self.annotations_file, backup_subdir / "annotations.json")
+            files.append(self.annotations_file)
+
+        # Hardlinks are near free; copies (fallback) are I/O bound, so overlap them
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda src: _snapshot_file(src, backup_subdir / src.name), files))
 
         print(f"💾 Backed up contexts to {backup_subdir}")
 
     def scan_code_annotations(self, file_path: str) -> List[CodeAnnotation]:
         """Scan a file for agent annotations"""
-        annotations = []
-
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    # Match: // @agent: agent-name
-                    if '@agent:' in line:
-                        match = re.search(r'@agent:\s*(\S+)', line)
-                        if match:
-                            agent_name = match.group(1)
-
-                            # Try to find timestamp, task, notes on nearby lines
-                            timestamp = ""
-                            task_ref = ""
-                            notes = ""
-
-                            # Look ahead a few lines
-                            f.seek(0)
-                            lines = f.readlines()
-                            for i in range(line_num, min(line_num + 5, len(lines))):
-                                if '@timestamp:' in lines[i]:
-                                    timestamp = re.search(r'@timestamp:\s*(.+)', lines[i]).group(1).strip()
-                                if '@task:' in lines[i]:
-                                    task_ref = re.search(r'@task:\s*(.+)', lines[i]).group(1).strip()
-                                if '@notes:' in lines[i]:
-                                    notes = re.search(r'@notes:\s*(.+)', lines[i]).group(1).strip()
-
-                            annotation = CodeAnnotation(
-                                file_path=str(file_path),
-                                line_number=line_num,
-                                agent_name=agent_name,
-                                timestamp=timestamp,
-                                task_ref=task_ref,
-                                notes=notes
-                            )
-                            annotations.append(annotation)
-
-        except Exception as e:
-            print(f"⚠️  Error scanning {file_path}: {e}")
-
-        return annotations
+        _, annotations = _scan_file(str(file_path))
+        return [CodeAnnotation(**ann) for ann in annotations or []]
 
     def update_annotations_index(self):
         """Scan all code files and update annotations index"""
         print("🔍 Scanning for code annotations...")
 
-        # Scan TypeScript files
-        for ts_file in self.base_dir.glob("**/*.ts"):
-            # Skip node_modules, dist, etc.
-            if any(skip in str(ts_file) for skip in ['node_modules', 'dist', '.git']):
+        # Scan TypeScript files (node_modules, dist, etc. are never entered),
+        # reusing cached results for files whose mtime and size are unchanged
+        index = self._load_index()
+        current = {}
+        stale = []
+        for entry in _iter_ts_files(self.base_dir):
+            try:
+                stat = entry.stat()
+            except OSError:
                 continue
+            cached = index.get(entry.path)
+            if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                current[entry.path] = cached
+            else:
+                current[entry.path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "annotations": []}
+                stale.append(entry.path)
+
+        failed = []
+        for file_path, annotations in self._scan_files(stale):
+            if annotations is None:
+                # Left out of the index so the next scan retries it
+                del current[file_path]
+                failed.append(file_path)
+            else:
+                current[file_path]["annotations"] = annotations
+
+        # Deleted files and files without annotations drop out
+        annotations = {
+            file_path: [CodeAnnotation(**ann) for ann in entry["annotations"]]
+            for file_path, entry in current.items()
+            if entry["annotations"]
+        }
 
-            annotations = self.scan_code_annotations(ts_file)
-            if annotations:
-                self.annotations[str(ts_file)] = annotations
+        # Files that couldn't be read this time keep what was last known
+        for file_path in failed:
+            if file_path in self.annotations:
+                annotations[file_path] = self.annotations[file_path]
+        self.annotations = annotations
 
+        self._save_index(current)
         self._save_annotations()
         print(f"✅ Found {sum(len(a) for a in self.annotations.values())} annotations")
 
+    @staticmethod
+    def _scan_files(paths: List[str]) -> Iterator[Tuple[str, Optional[List[Dict]]]]:
+        """Scan files in-process, or on a process pool sized to the work if there are many"""
+        if len(paths) < _PARALLEL_SCAN_MIN_FILES:
+            yield from map(_scan_file, paths)
+            return
+
+        # Files are small, so batch them to keep IPC overhead down
+        workers = min(os.cpu_count() or 1, -(-len(paths) // _SCAN_CHUNK))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_scan_file, paths, chunksize=_SCAN_CHUNK)
+
+    def refresh_annotations(self, paths):
+        """Rescan only the given files and update the annotations index"""
+        index = self._load_index()
+
+        for file_path in paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                # Deleted or moved away
+                index.pop(file_path, None)
+                self.annotations.pop(file_path, None)
+                continue
+
+            _, annotations = _scan_file(file_path)
+            if annotations is None:
+                # Keep last known annotations; the next full scan retries it
+                index.pop(file_path, None)
+                continue
+
+            index[file_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "annotations": annotations}
+            if annotations:
+                self.annotations[file_path] = [CodeAnnotation(**ann) for ann in annotations]
+            else:
+                self.annotations.pop(file_path, None)
+
+        self._save_index(index)
+        self._save_annotations()
+        print(f"🔍 Rescanned {len(paths)} changed file(s)")
+
     def get_relevant_context(self, agent_name: str, file_path: str) -> List[Dict]:
         """Get relevant context from other agents who worked on this file"""
         relevant = []
@@ -242,7 +787,7 @@ class AgentContextManager:
                                 relevant.append({
                                     'agent': ann.agent_name,
                                     'task': ann.task_ref,
-                                    'message': msg,
+                                    'message': dict(msg, content=self.message_content(msg)),
                                     'notes': ann.notes
                                 })
 
@@ -255,69 +800,207 @@ class AgentContextManager:
         if not task_path.exists():
             return {"status": "not_found"}
 
-        with open(task_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-            # Count completed tasks
-            total_tasks = len(re.findall(r'- \[ \]', content))
-            completed = len(re.findall(r'- \[x\]', content))
-
-            # Look for status markers
-            status_match = re.search(r'\*\*Status:\*\*\s*([^|\n]+)', content)
-            status = status_match.group(1).strip() if status_match else "Unknown"
-
-            return {
-                "file": task_file,
-                "total_tasks": total_tasks,
-                "completed": completed,
-                "progress": f"{completed}/{total_tasks}",
-                "status": status
-            }
+        with open(task_path, 'rb') as f:
+            # Empty files cannot be memory-mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                return self._parse_task_status(task_file, b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return self._parse_task_status(task_file, content)
+
+    def _parse_task_status(self, task_file: str, content) -> Dict:
+        """Extract task counts and status marker from raw task file bytes"""
+        # Count completed tasks
+        total_tasks = len(_TASK_OPEN_RE.findall(content))
+        completed = len(_TASK_DONE_RE.findall(content))
+
+        # Look for status markers
+        status_match = _TASK_STATUS_RE.search(content)
+        status = status_match.group(1).decode('utf-8', 'replace').strip() if status_match else "Unknown"
+
+        return {
+            "file": task_file,
+            "total_tasks": total_tasks,
+            "completed": completed,
+            "progress": f"{completed}/{total_tasks}",
+            "status": status
+        }
 
     def generate_status_report(self) -> str:
         """Generate overall status report"""
-        report = []
-        report.append("=" * 60)
-        report.append("FXD AGENT STATUS REPORT")
-        report.append(f"Generated: {datetime.now().isoformat()}")
-        report.append("=" * 60)
-        report.append("")
+        report = io.StringIO()
+        report.write("=" * 60 + "\n")
+        report.write("FXD AGENT STATUS REPORT\n")
+        report.write(f"Generated: {datetime.now().isoformat()}\n")
+        report.write("=" * 60 + "\n\n")
 
         # Agent status
-        report.append("ACTIVE AGENTS:")
+        report.write("ACTIVE AGENTS:\n")
         for agent_name, context in self.agents.items():
-            report.append(f"  {agent_name}")
-            report.append(f"    Task: {context.task_file}")
-            report.append(f"    Tokens: {context.current_tokens:,}/{context.max_tokens:,}")
-            report.append(f"    Messages: {len(context.messages)}")
-            report.append("")
+            report.write(
+                f"  {agent_name}\n"
+                f"    Task: {context.task_file}\n"
+                f"    Tokens: {context.current_tokens:,}/{context.max_tokens:,}\n"
+                f"    Messages: {len(context.messages)}\n\n"
+            )
 
         # Task progress (ASCII only to avoid encoding issues)
-        report.append("TASK PROGRESS:")
+        report.write("TASK PROGRESS:\n")
         tasks_dir = self.base_dir / "tasks"
         if tasks_dir.exists():
             for task_file in tasks_dir.glob("*.md"):
                 try:
                     status = self.get_task_status(task_file.name)
                     if status['status'] != 'not_found':
-                        report.append(f"  {task_file.name}")
-                        report.append(f"    Progress: {status['progress']}")
-                        # Strip any unicode characters from status
-                        status_str = status['status'].encode('ascii', 'ignore').decode('ascii')
-                        report.append(f"    Status: {status_str}")
-                        report.append("")
+                        # Strip any unicode characters from status (rarely present)
+                        status_str = status['status']
+                        if not status_str.isascii():
+                            status_str = status_str.encode('ascii', 'ignore').decode('ascii')
+                        report.write(
+                            f"  {task_file.name}\n"
+                            f"    Progress: {status['progress']}\n"
+                            f"    Status: {status_str}\n\n"
+                        )
                 except Exception as e:
-                    report.append(f"  {task_file.name} - Error reading: {str(e)}")
-                    report.append("")
+                    report.write(f"  {task_file.name} - Error reading: {str(e)}\n\n")
 
         # Code annotations
-        report.append("CODE ANNOTATIONS:")
+        report.write("CODE ANNOTATIONS:\n")
         total_annotations = sum(len(a) for a in self.annotations.values())
-        report.append(f"  Total: {total_annotations}")
-        report.append(f"  Files: {len(self.annotations)}")
-        report.append("")
+        report.write(f"  Total: {total_annotations}\n")
+        report.write(f"  Files: {len(self.annotations)}\n")
+
+        return report.getvalue()
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Queues changed .ts files and flags context changes for the daemon"""
+
+    def __init__(self, manager: AgentContextManager, changes: queue.Queue, observer=None):
+        super().__init__()
+        self.manager = manager
+        self.changes = changes
+        self.observer = observer
+        self.contexts_changed = threading.Event()
+
+        # Watched directory -> its (non-recursive) watch
+        self.watches = {}
+
+    def on_any_event(self, event):
+        if event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+            return
+
+        if event.is_directory:
+            self._on_directory_event(event)
+            return
+
+        for path in (event.src_path, getattr(event, 'dest_path', '')):
+            if not path:
+                continue
+            if os.path.dirname(path) == str(self.manager.context_dir):
+                self.contexts_changed.set()
+            elif path.endswith('.ts') and not self._is_skipped(path):
+                self.changes.put(path)
+
+    def _is_skipped(self, path: str) -> bool:
+        """Whether path is outside base_dir or inside a skipped directory"""
+        try:
+            parts = Path(path).relative_to(self.manager.base_dir).parts
+        except ValueError:
+            # Not lexically under base_dir (e.g. a resolved symlink path)
+            return True
+        return not _SKIP_DIRS.isdisjoint(parts)
+
+    def _on_directory_event(self, event):
+        """Watch directories as they appear and drop the watches of removed ones"""
+        if self.observer is None:
+            return
+
+        if event.event_type in ('deleted', 'moved'):
+            self.unwatch_directory(event.src_path)
+
+        if event.event_type in ('created', 'moved'):
+            path = event.dest_path if event.event_type == 'moved' else event.src_path
+            if not self._is_skipped(path) and path not in self.watches:
+                self.watch_directory(path)
+
+    def watch_directory(self, path: str, rescan: bool = True):
+        """Watch path and the directories under it, queueing the .ts files already there
+
+        Each directory gets its own non-recursive watch, so skipped directories
+        (node_modules at any depth) are never watched at all.
+        """
+        for directory in _iter_dirs(path):
+            if directory in self.watches:
+                continue
+            try:
+                self.watches[directory] = self.observer.schedule(self, directory, recursive=False)
+            except OSError as e:
+                # Removed again before the watch was in place
+                print(f"⚠️  Error watching {directory}: {e}")
+
+        # Files may have landed before the watch was in place
+        if rescan:
+            for entry in _iter_ts_files(path):
+                self.changes.put(entry.path)
+
+    def unwatch_directory(self, path: str):
+        """Drop the watches of path and the directories under it"""
+        prefix = os.path.join(path, '')
+        for directory in [d for d in self.watches if d == path or d.startswith(prefix)]:
+            self.observer.unschedule(self.watches.pop(directory))
+
+
+def _annotation_worker(manager: AgentContextManager, changes: queue.Queue, lock: threading.Lock,
+                       debounce: float = 2.0):
+    """Rescan changed files, coalescing events that arrive within debounce seconds"""
+    while True:
+        paths = {changes.get()}
+        while True:
+            try:
+                paths.add(changes.get(timeout=debounce))
+            except queue.Empty:
+                break
+
+        # A failed rescan must not end the thread, or rescans stop for good
+        try:
+            with lock:
+                manager.refresh_annotations(paths)
+        except Exception as e:
+            print(f"⚠️  Error rescanning {len(paths)} file(s): {e}")
+
+
+def _watch(manager: AgentContextManager, interval: int):
+    """Run the daemon on filesystem events; back up only when contexts changed"""
+    changes = queue.Queue()
+
+    # Watch directories one by one so node_modules etc. are never watched;
+    # the initial full scan already covered the files that exist now
+    observer = Observer()
+    handler = _ChangeHandler(manager, changes, observer)
+    handler.watch_directory(str(manager.base_dir), rescan=False)
+    observer.start()
+
+    # Guards manager.annotations, which the worker replaces entries of
+    lock = threading.Lock()
+    threading.Thread(target=_annotation_worker, args=(manager, changes, lock), daemon=True).start()
+
+    try:
+        while True:
+            time.sleep(interval)
+            if handler.contexts_changed.is_set():
+                handler.contexts_changed.clear()
+                manager.backup_all_contexts()
+
+                with lock:
+                    total_annotations = sum(len(a) for a in manager.annotations.values())
+
+                # Print status
+                print(f"\n{datetime.now().isoformat()}")
+                print(f"Agents: {len(manager.agents)}")
+                print(f"Annotations: {total_annotations}")
+    finally:
+        observer.stop()
+        observer.join()
 
-        return "\n".join(report)
 
 def main():
     """Main entry point"""
@@ -345,23 +1028,36 @@ def main():
         if not args.agent:
             print("Error: --agent required for trim")
             return
+        context = manager.load_context(args.agent)
+        if not context:
+            print(f"Error: no context found for {args.agent}")
+            return
+        manager.agents[args.agent] = context
         manager._trim_context(args.agent)
+        manager._save_context(args.agent, context)
 
     elif args.command == 'daemon':
         print(f"🚀 Starting context manager daemon (interval: {args.interval}s)")
         print("Press Ctrl+C to stop")
 
         try:
-            while True:
+            if Observer is not None:
+                # Catch up on anything that changed while the daemon was down
                 manager.backup_all_contexts()
                 manager.update_annotations_index()
-
-                # Print status
-                print(f"\n{datetime.now().isoformat()}")
-                print(f"Agents: {len(manager.agents)}")
-                print(f"Annotations: {sum(len(a) for a in manager.annotations.values())}")
-
-                time.sleep(args.interval)
+                _watch(manager, args.interval)
+            else:
+                print("ℹ️  watchdog not installed, polling instead (pip install watchdog)")
+                while True:
+                    manager.backup_all_contexts()
+                    manager.update_annotations_index()
+
+                    # Print status
+                    print(f"\n{datetime.now().isoformat()}")
+                    print(f"Agents: {len(manager.agents)}")
+                    print(f"Annotations: {sum(len(a) for a in manager.annotations.values())}")
+
+                    time.sleep(args.interval)
 
         except KeyboardInterrupt:
             print("\n\n👋 Daemon stopped")
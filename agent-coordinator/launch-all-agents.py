@@ -3,8 +3,6 @@
 Launch all 10 FXD agents in separate Claude Code instances
 """
 
-import subprocess
-import time
 import json
 from pathlib import Path
 
@@ -348,8 +346,7 @@ def launch_phase2():
     print("Launching all 9 agents simultaneously...\n")
 
     for agent in AGENTS[1:]:
-        instruction_file = launch_agent(agent)
-        time.sleep(0.5)  # Small delay between launches
+        launch_agent(agent)
 
     print("\n[OK] ALL AGENT INSTRUCTIONS GENERATED")
     print("\nTo launch each agent:")
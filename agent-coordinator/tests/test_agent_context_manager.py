@@ -0,0 +1,292 @@
+"""Tests for agent-context-manager.py (run: python -m unittest discover agent-coordinator/tests)"""
+
+import importlib.util
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "agent-context-manager.py"
+_spec = importlib.util.spec_from_file_location("agent_context_manager", _SCRIPT)
+acm = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = acm  # Lets worker processes unpickle _scan_file
+_spec.loader.exec_module(acm)
+
+
+def _failing_scan(file_path):
+    """Stand-in for _scan_file when the file can't be read"""
+    return file_path, None
+
+
+class ManagerTestCase(unittest.TestCase):
+    """Gives each test a manager rooted in a fresh temp directory"""
+
+    def setUp(self):
+        self.base_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.base_dir, ignore_errors=True)
+        self.manager = acm.AgentContextManager(str(self.base_dir))
+
+
+class MessageLogTests(ManagerTestCase):
+
+    def test_append_after_partial_line_keeps_next_message(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+        self.manager.add_message("agent-a", "user", "one", 1)
+
+        # Simulate an append interrupted mid-write
+        with open(self.manager.context_dir / "agent-a.jsonl", 'ab') as f:
+            f.write(b'{"role": "user", "cont')
+
+        self.manager.add_message("agent-a", "user", "two", 1)
+        self.manager.add_message("agent-a", "user", "three", 1)
+
+        context = self.manager.load_context("agent-a")
+        self.assertEqual([m["content"] for m in context.messages], ["one", "two", "three"])
+
+    def test_plain_message_only_appends(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+
+        with mock.patch.object(acm, '_atomic_write', wraps=acm._atomic_write) as atomic_write:
+            self.manager.add_message("agent-a", "user", "hello", 1)
+            self.assertFalse(atomic_write.called)
+
+            self.manager.add_message("agent-a", "system", "prompt", 2)
+            self.assertTrue(atomic_write.called)
+
+        context = self.manager.load_context("agent-a")
+        self.assertEqual(context.system_message["content"], "prompt")
+        self.assertEqual(context.current_tokens, 3)
+
+
+class AtomicWriteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    @unittest.skipIf(os.name == 'nt', "POSIX permissions")
+    def test_new_file_follows_umask(self):
+        path = self.dir / "new.json"
+        with mock.patch.object(acm, '_FILE_MODE', 0o644):
+            acm._atomic_write(path, b'{}')
+        self.assertEqual(path.stat().st_mode & 0o777, 0o644)
+
+    @unittest.skipIf(os.name == 'nt', "POSIX permissions")
+    def test_replaced_file_keeps_its_mode(self):
+        path = self.dir / "existing.json"
+        path.write_bytes(b'{}')
+        path.chmod(0o640)
+        acm._atomic_write(path, b'[]')
+        self.assertEqual(path.stat().st_mode & 0o777, 0o640)
+        self.assertEqual(path.read_bytes(), b'[]')
+
+
+class BackupTests(ManagerTestCase):
+
+    def test_backups_in_the_same_second(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+        self.manager.add_message("agent-a", "user", "one", 1)
+
+        with mock.patch.object(acm, 'datetime', wraps=acm.datetime) as clock:
+            clock.now.return_value = acm.datetime(2026, 1, 1, 12, 0, 0)
+            self.manager.backup_all_contexts()
+            # Meta rewritten between the two backups: new inode, new content
+            self.manager.add_message("agent-a", "system", "prompt", 1)
+            self.manager.backup_all_contexts()
+
+        snapshot = self.manager.backup_dir / "20260101_120000" / "agent-a.meta.json"
+        self.assertTrue(snapshot.samefile(self.manager.context_dir / "agent-a.meta.json"))
+        self.assertIn("prompt", snapshot.read_text())
+
+
+class AnnotationIndexTests(ManagerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.source = self.base_dir / "src" / "module.ts"
+        self.source.parent.mkdir()
+        self.source.write_text("// @agent: agent-a\n// @task: TASK.md#1\nexport {};\n")
+
+    def test_failed_scan_is_retried(self):
+        with mock.patch.object(acm, '_scan_file', _failing_scan):
+            self.manager.update_annotations_index()
+        self.assertEqual(self.manager.annotations, {})
+
+        # File unchanged, but the failed result must not have been cached
+        self.manager.update_annotations_index()
+        annotations = self.manager.annotations[str(self.source)]
+        self.assertEqual([(a.agent_name, a.task_ref) for a in annotations], [("agent-a", "TASK.md#1")])
+
+    def test_few_stale_files_are_scanned_in_process(self):
+        with mock.patch.object(acm, 'ProcessPoolExecutor') as pool:
+            self.manager.update_annotations_index()
+        pool.assert_not_called()
+        self.assertIn(str(self.source), self.manager.annotations)
+
+    def test_many_stale_files_use_a_pool_sized_to_the_work(self):
+        for i in range(acm._PARALLEL_SCAN_MIN_FILES):
+            (self.source.parent / f"extra{i}.ts").write_text(f"// @agent: agent-{i}\n")
+
+        self.manager.update_annotations_index()
+        self.assertEqual(len(self.manager.annotations), acm._PARALLEL_SCAN_MIN_FILES + 1)
+
+        with mock.patch.object(acm, 'ProcessPoolExecutor') as pool, \
+                mock.patch.object(acm.os, 'cpu_count', return_value=64):
+            list(self.manager._scan_files(["a.ts"] * 65))
+        pool.assert_called_once_with(max_workers=3)
+
+    def test_failed_refresh_keeps_known_annotations(self):
+        self.manager.update_annotations_index()
+
+        with mock.patch.object(acm, '_scan_file', _failing_scan):
+            self.manager.refresh_annotations({str(self.source)})
+
+        self.assertIn(str(self.source), self.manager.annotations)
+        self.assertNotIn(str(self.source), self.manager._load_index())
+
+
+class AnnotationWorkerTests(ManagerTestCase):
+
+    def test_worker_survives_failed_refresh(self):
+        refreshed = threading.Event()
+        calls = []
+
+        def refresh(paths):
+            calls.append(paths)
+            if len(calls) == 1:
+                raise OSError("sharing violation")
+            refreshed.set()
+
+        changes = queue.Queue()
+        with mock.patch.object(self.manager, 'refresh_annotations', side_effect=refresh):
+            worker = threading.Thread(
+                target=acm._annotation_worker, args=(self.manager, changes, threading.Lock(), 0.01), daemon=True
+            )
+            worker.start()
+            changes.put("first.ts")
+            while not calls:
+                refreshed.wait(0.01)
+            changes.put("second.ts")
+            self.assertTrue(refreshed.wait(5))
+
+        self.assertEqual(calls, [{"first.ts"}, {"second.ts"}])
+
+
+class CompressTierTests(ManagerTestCase):
+
+    def test_compresses_old_content_ref_message(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+        block = "```ts\n" + "const value = compute(input);\n" * 200 + "```"
+        content = "Here is the file:\n" + block + "\nLooks good."
+        self.assertGreater(len(content), acm._CONTENT_REF_MIN_CHARS)
+
+        self.manager.add_message("agent-a", "assistant", content, 1500)
+        context = self.manager.agents["agent-a"]
+        old = context.messages[0]
+        self.assertIn("content_ref", old)
+
+        freed = self.manager._compress_tier(context.messages, keep_recent=0)
+
+        self.assertGreater(freed, 0)
+        self.assertEqual(old["tokens"], 1500 - freed)
+        self.assertNotIn("content_ref", old)  # Small enough to go back inline
+        self.assertRegex(old["content"], r"^Here is the file:\n<blob:[0-9a-f]+>\nLooks good\.$")
+        self.assertEqual(self.manager.expand_blobs(self.manager.message_content(old)), content)
+
+    def test_compresses_json_document_but_not_bracketed_prose(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+        document = "{\n" + ",\n".join(f'  "key{i}": "value {i}"' for i in range(60)) + "\n}"
+        log = "[link] see the docs\n" + "[12:00:00] INFO request handled\n" * 40 + "]\n"
+        content = log + document + "\nDone."
+
+        self.manager.add_message("agent-a", "tool", content, 1000)
+        old = self.manager.agents["agent-a"].messages[0]
+        self.assertGreater(self.manager._compress_tier(self.manager.agents["agent-a"].messages, keep_recent=0), 0)
+
+        self.assertRegex(old["content"], r"^\[link\] see the docs\n(\[12:00:00\] INFO request handled\n){40}\]\n<blob:[0-9a-f]+>\nDone\.$")
+        self.assertEqual(self.manager.expand_blobs(old["content"]), content)
+
+    def test_compressed_messages_are_not_rescanned(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+        self.manager.add_message("agent-a", "tool", "[x] done\n" * 1000, 2000)
+        messages = self.manager.agents["agent-a"].messages
+
+        self.assertEqual(self.manager._compress_tier(messages, keep_recent=0), 0)
+        with mock.patch.object(self.manager, 'message_content') as message_content:
+            self.assertEqual(self.manager._compress_tier(messages, keep_recent=0), 0)
+        message_content.assert_not_called()
+
+    def test_keeps_recent_messages(self):
+        self.manager.register_agent("agent-a", "TASK.md")
+        self.manager.add_message("agent-a", "assistant", "```\n" + "x" * 1000 + "\n```", 300)
+        context = self.manager.agents["agent-a"]
+
+        self.assertEqual(self.manager._compress_tier(context.messages, keep_recent=1), 0)
+
+
+def _event(event_type, src_path, is_directory=False, dest_path=''):
+    """Minimal stand-in for a watchdog FileSystemEvent"""
+    return SimpleNamespace(event_type=event_type, src_path=src_path, dest_path=dest_path, is_directory=is_directory)
+
+
+class ChangeHandlerTests(ManagerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.changes = queue.Queue()
+        self.observer = mock.Mock()
+        self.handler = acm._ChangeHandler(self.manager, self.changes, self.observer)
+
+    def queued(self):
+        return sorted(self.changes.get_nowait() for _ in range(self.changes.qsize()))
+
+    def test_path_outside_base_dir_is_ignored(self):
+        self.handler.on_any_event(_event('modified', "/private/elsewhere/module.ts"))
+        self.assertEqual(self.queued(), [])
+
+    def test_skipped_directories_are_ignored(self):
+        path = str(self.base_dir / "node_modules" / "pkg" / "index.ts")
+        self.handler.on_any_event(_event('modified', path))
+        self.assertEqual(self.queued(), [])
+
+    def test_new_directory_is_watched(self):
+        new_dir = self.base_dir / "packages"
+        (new_dir / "core").mkdir(parents=True)
+        (new_dir / "core" / "early.ts").write_text("// @agent: agent-a\n")
+
+        self.handler.on_any_event(_event('created', str(new_dir), is_directory=True))
+
+        self.assertEqual(sorted(self.handler.watches), [str(new_dir), str(new_dir / "core")])
+        self.observer.schedule.assert_any_call(self.handler, str(new_dir / "core"), recursive=False)
+        self.assertEqual(self.queued(), [str(new_dir / "core" / "early.ts")])
+
+        # Removing the directory drops its subdirectories' watches too
+        self.handler.on_any_event(_event('deleted', str(new_dir), is_directory=True))
+        self.assertEqual(self.observer.unschedule.call_count, 2)
+        self.assertEqual(self.handler.watches, {})
+
+    def test_nested_skipped_directory_is_not_watched(self):
+        app = self.base_dir / "visualizer-app"
+        (app / "node_modules" / "pkg").mkdir(parents=True)
+        (app / "src").mkdir()
+
+        self.handler.watch_directory(str(self.base_dir), rescan=False)
+
+        self.assertIn(str(app / "src"), self.handler.watches)
+        self.assertFalse([d for d in self.handler.watches if "node_modules" in d])
+
+        self.handler.on_any_event(_event('created', str(app / "src" / "dist"), is_directory=True))
+        self.assertNotIn(str(app / "src" / "dist"), self.handler.watches)
+
+    def test_new_skipped_directory_is_not_watched(self):
+        self.handler.on_any_event(_event('created', str(self.base_dir / "dist"), is_directory=True))
+        self.observer.schedule.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()